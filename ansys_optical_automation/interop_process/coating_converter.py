@@ -312,7 +312,6 @@ class CoatingConverter:
 
         """
         coating_file_dir = os.path.join(self.coatingfolder, "Speos", coating_file_name + ".coated")
-        coating_file_output = open(coating_file_dir, "w")
 
         # Need to loop for all wavelength
         # coating_data = None
@@ -330,7 +329,8 @@ class CoatingConverter:
 
         myformat = "{:." + str(nb_digits) + "f}"
 
-        # Writing the file
+        # Writing the file content in memory, the file is written at once
+        coating_file_output = io.StringIO()
         coating_file_output.write("OPTIS - Coated surface file v1.0\n")
         coating_file_output.write(coating_file_name + "\n")
         coating_file_output.write(str(nb_angle_of_incidence) + " " + str(nb_wavelength) + "\n")
@@ -369,6 +369,8 @@ class CoatingConverter:
                     + "\t"
                 )
             coating_file_output.write("\n")
+        with open(coating_file_dir, "w") as coating_file:
+            coating_file.write(coating_file_output.getvalue())
         coating_file_output.close()
         # print("File " + coatingfilename1 + " created")
         coating_data.clear()
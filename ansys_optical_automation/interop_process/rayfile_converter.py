@@ -59,15 +59,8 @@ class RayfileConverter(DpfRayfile):
         zemax_spectrum_file.write(struct.pack("<I", 0))  # flux_type is Watts
         zemax_spectrum_file.write(struct.pack("<I", 0))  # reversed1 (int)
         zemax_spectrum_file.write(struct.pack("<I", 0))  # reversed2 (int)
-        for ray in self.rays:
-            zemax_spectrum_file.write(struct.pack("f", ray.coordinate_x))  # x
-            zemax_spectrum_file.write(struct.pack("f", ray.coordinate_y))  # y
-            zemax_spectrum_file.write(struct.pack("f", ray.coordinate_z))  # z
-            zemax_spectrum_file.write(struct.pack("f", ray.radiation_l))  # l
-            zemax_spectrum_file.write(struct.pack("f", ray.radiation_m))  # m
-            zemax_spectrum_file.write(struct.pack("f", ray.radiation_n))  # n
-            zemax_spectrum_file.write(struct.pack("f", ray.energy))  # flux (Watts)
-            zemax_spectrum_file.write(struct.pack("f", ray.wavelength))  # wavelength
+        # x, y, z, l, m, n, flux (Watts), wavelength for every ray
+        zemax_spectrum_file.write(self._pack_rays(self.zemax_ray_columns))
         zemax_spectrum_file.close()
 
     def __export_to_speos(self):
@@ -88,15 +81,8 @@ class RayfileConverter(DpfRayfile):
         speos_ray_file.write(struct.pack("f", 2.0))
         speos_ray_file.write(struct.pack("f", 2.0))
         speos_ray_file.write(struct.pack("f", self.photometric_power))
-        for ray in self.rays:
-            speos_ray_file.write(struct.pack("f", ray.coordinate_x))
-            speos_ray_file.write(struct.pack("f", ray.coordinate_y))
-            speos_ray_file.write(struct.pack("f", ray.coordinate_z))
-            speos_ray_file.write(struct.pack("f", ray.radiation_l))
-            speos_ray_file.write(struct.pack("f", ray.radiation_m))
-            speos_ray_file.write(struct.pack("f", ray.radiation_n))
-            speos_ray_file.write(struct.pack("f", ray.wavelength * 1000))
-            speos_ray_file.write(struct.pack("f", ray.energy))
+        # x, y, z, l, m, n, wavelength (nm), flux for every ray
+        speos_ray_file.write(self._pack_rays(self.speos_ray_columns, wavelength_scale=1000))
         speos_ray_file.close()
 
     def speos_to_zemax(self):
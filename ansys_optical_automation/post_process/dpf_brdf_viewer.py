@@ -2,8 +2,6 @@ import math
 import os
 
 import numpy as np
-from scipy import interpolate
-from scipy.integrate import nquad
 
 EPSILON = 1e-6
 
@@ -34,6 +32,7 @@ class BrdfStructure:
         self.__incident_angles = []
         self.__theta_1d_ressampled = None
         self.__phi_1d_ressampled = None
+        self.__measurement_groups = None
         self.measurement_2d_brdf = []
         self.brdf = []
         self.reflectance = []
@@ -69,37 +68,57 @@ class BrdfStructure:
 
 
         """
-        theta_brdf = [
-            [MeasurePoint.theta, MeasurePoint.brdf]
-            for MeasurePoint in self.measurement_2d_brdf
-            if (MeasurePoint.incidence == incident and MeasurePoint.wavelength == wavelength)
-        ]
-        theta_brdf = np.array(theta_brdf).T
+        from scipy import interpolate
+
+        measurement_groups = self.__measurement_groups
+        if measurement_groups is None:
+            measurement_groups = self.__group_measurements()
+        theta_brdf = np.array(measurement_groups.get((incident, wavelength), [[], []]))
         return interpolate.interp1d(theta_brdf[0], theta_brdf[1], fill_value="extrapolate"), np.max(theta_brdf[0])
 
+    def __group_measurements(self):
+        """
+        to group the 2d measurement brdf points by incidence and wavelength.
+
+        Returns
+        -------
+        dict
+            dictionary with (incidence, wavelength) as keys and [theta list, brdf list] as values.
+
+        """
+        measurement_groups = {}
+        for MeasurePoint in self.measurement_2d_brdf:
+            key = (MeasurePoint.incidence, MeasurePoint.wavelength)
+            if key not in measurement_groups:
+                measurement_groups[key] = [[], []]
+            measurement_groups[key][0].append(MeasurePoint.theta)
+            measurement_groups[key][1].append(MeasurePoint.brdf)
+        return measurement_groups
+
     def __brdf_reflectance(self, theta, phi, brdf):
         """
-        function to calculate the reflectance of the brdf at one incident and wavelength
+        function to calculate the reflectance of the brdf tables for all incidents and wavelengths
 
         Parameters
         ----------
         theta : np.array
         phi : np.array
-        brdf : 2d brdf function
+        brdf : np.array
+            brdf tables, the last two axes being phi and theta
 
         Returns
         -------
-        float
-            brdf reflectance value.
+        np.array
+            brdf reflectance values, one per table.
 
         """
+        from scipy.integrate import trapezoid
+
         theta_rad, phi_rad = np.radians(theta), np.radians(phi)  # samples on which integrande is known
         integrande = (1 / math.pi) * brdf * np.sin(theta_rad)  # *theta for polar integration
-        f = interpolate.interp2d(theta_rad, phi_rad, integrande, kind="linear", bounds_error=False, fill_value=0)
-        # calculation of integrande as from from samples
-        r = nquad(f, [[0, math.pi / 2], [0, 2 * math.pi]], opts=[{"epsabs": 0.1}, {"epsabs": 0.1}])
-        # reflectance calculaiton thanks to nquad lib
-        return min(r[0] * 100, 100)  # return reflectance as percentage
+        # integrande is sampled on the regular theta / phi grid, integrate over theta then phi
+        r = trapezoid(trapezoid(integrande, theta_rad, axis=-1), phi_rad, axis=-1)
+        return np.minimum(r * 100, 100)  # return reflectance as percentage
 
     def convert(self, sampling=1):
         """
@@ -116,16 +135,16 @@ class BrdfStructure:
 
         """
 
-        def brdf_2d_function(theta, phi):
+        def brdf_2d_function(theta_cos_phi, theta_sin_phi):
             """
             an internal method to calculate the 2d brdf based on location theta and phi.
 
             Parameters
             ----------
-            theta : float
-                target point with theta value
-            phi : float
-                target point with phi value
+            theta_cos_phi : float
+                target point theta value multiplied by cos(phi)
+            theta_sin_phi : float
+                target point theta value multiplied by sin(phi)
 
             Returns
             -------
@@ -134,50 +153,44 @@ class BrdfStructure:
 
             """
             # function that calculated 2d brdf from 1d using revolution assumption.
-            angular_distance = np.sqrt(
-                (incidence - theta * np.cos(np.radians(phi))) ** 2 + (theta * np.sin(np.radians(phi))) ** 2
-            )
+            angular_distance = np.sqrt((incidence - theta_cos_phi) ** 2 + theta_sin_phi**2)
             # +4l for interpolation between measurement value on both side from specular direction
             angular_distance = np.where(angular_distance < EPSILON, 1, angular_distance)
             # special case for specular point (no interpolation due to null distance)
-            weight = (incidence + angular_distance - theta * np.cos(np.radians(phi))) / (2 * angular_distance)
+            weight = (incidence + angular_distance - theta_cos_phi) / (2 * angular_distance)
             weight = np.where(incidence + angular_distance > theta_max, 1, weight)
             # theta max : maximal reflected angle that is measured. for angle > theta_max we do not have values
             return weight * (brdf_1d(incidence - angular_distance)) + (1 - weight) * brdf_1d(
                 incidence + angular_distance
             )
 
+        # measurement points are grouped once instead of searched for every incidence and wavelength
+        self.__measurement_groups = self.__group_measurements()
         if len(self.__incident_angles) == 0:
-            for measurement in self.measurement_2d_brdf:
-                if measurement.incidence not in self.__incident_angles:
-                    self.__incident_angles.append(measurement.incidence)
+            for incidence, wavelength in self.__measurement_groups:
+                if incidence not in self.__incident_angles:
+                    self.__incident_angles.append(incidence)
         # mesh grid for direct 2d matrix calculation
-        for incidence in self.__incident_angles:
-            for wavelength in self.__wavelengths:
+        self.__theta_1d_ressampled = np.linspace(0, 90, int(90 / sampling + 1))
+        self.__phi_1d_ressampled = np.linspace(0, 360, int(360 / sampling + 1))
+        theta_2d_ressampled, phi_2d_ressampled = np.meshgrid(self.__theta_1d_ressampled, self.__phi_1d_ressampled)
+        # the grid projections do not depend on incidence or wavelength, compute them once for all tables
+        phi_2d_rad = np.radians(phi_2d_ressampled)
+        theta_cos_phi = theta_2d_ressampled * np.cos(phi_2d_rad)
+        theta_sin_phi = theta_2d_ressampled * np.sin(phi_2d_rad)
+        # brdf tables are filled in place, one (phi, theta) table per incidence and wavelength
+        self.brdf = np.empty((len(self.__incident_angles), len(self.__wavelengths)) + theta_2d_ressampled.shape)
+        for incidence_idx, incidence in enumerate(self.__incident_angles):
+            for wavelength_idx, wavelength in enumerate(self.__wavelengths):
                 brdf_1d, theta_max = self.brdf_1d_function(wavelength, incidence)
-                self.__theta_1d_ressampled = np.linspace(0, 90, int(90 / sampling + 1))
-                self.__phi_1d_ressampled = np.linspace(0, 360, int(360 / sampling + 1))
-                theta_2d_ressampled, phi_2d_ressampled = np.meshgrid(
-                    self.__theta_1d_ressampled, self.__phi_1d_ressampled
-                )
-                self.brdf.append(brdf_2d_function(theta_2d_ressampled, phi_2d_ressampled))
-                self.reflectance.append(
-                    self.__brdf_reflectance(self.__theta_1d_ressampled, self.__phi_1d_ressampled, self.brdf[-1])
-                )
-        self.brdf = np.reshape(
-            self.brdf,
-            (
-                len(self.__incident_angles),
-                len(self.__wavelengths),
-                2 * int(180 / sampling + 1) - 1,
-                int(90 / sampling + 1),
-            ),
-        )
+                self.brdf[incidence_idx, wavelength_idx] = brdf_2d_function(theta_cos_phi, theta_sin_phi)
+        self.__measurement_groups = None
         if np.all(self.brdf == 0):
             msg = "All NULL values at brdf structure, please provide valid inputs"
             raise ValueError(msg)
+        # reflectance of all incidence and wavelength tables integrated at once
+        self.reflectance = self.__brdf_reflectance(self.__theta_1d_ressampled, self.__phi_1d_ressampled, self.brdf)
         self.brdf = np.moveaxis(self.brdf, 2, 3)
-        self.reflectance = np.reshape(self.reflectance, (len(self.__incident_angles), len(self.__wavelengths)))
 
     def export_to_speos(self, export_dir):
         """
@@ -196,42 +209,32 @@ class BrdfStructure:
         self.__valid_dir(export_dir)
         file_name = os.path.join(export_dir, self.file_name + ".brdf")
         export = open(file_name, "w")
-        export.write("OPTIS - brdf surface file v9.0\n")  # Header.
-        export.write("0\n")  # Defines the mode: 0 for text mode, 1 for binary mode.
-        export.write("Scattering surface\n")  # Comment line
-        export.write("0\n\n")  # Number of characters to read for the measurement description.
-        export.write("1\t0\n")  # Contains two boolean values (0=false and 1=true)
-        # The first bReflection tells whether the surface has reflection data or not.
-        # The second bTransmission tells whether the surface has transmission data or not.
-        export.write("1\n")  # Contains a boolean value describing the type of value stored in the file:
-        # 1 means the data is proportional to the BSDF.
-        # 0 means the data is proportional to the measured intensity or to the probability density function.
-        # Write BRDF sampling data
-        export.write(
-            "%d\t%d\n" % (self.brdf.shape[0], self.brdf.shape[1])
-        )  # Number of incident angles and Number of wavelength samples (in nanometer)
-        np.savetxt(
-            export, [self.__incident_angles], format("%.3f"), footer="\n", newline="", delimiter="\t", comments=""
-        )  # List of the incident angles.
-        np.savetxt(
-            export, [self.__wavelengths], format("%.1f"), footer="\n", newline="", delimiter="\t", comments=""
-        )  # List of wavelength
+        header = [
+            "OPTIS - brdf surface file v9.0\n",  # Header.
+            "0\n",  # Defines the mode: 0 for text mode, 1 for binary mode.
+            "Scattering surface\n",  # Comment line
+            "0\n\n",  # Number of characters to read for the measurement description.
+            "1\t0\n",  # Contains two boolean values (0=false and 1=true)
+            # The first bReflection tells whether the surface has reflection data or not.
+            # The second bTransmission tells whether the surface has transmission data or not.
+            "1\n",  # Contains a boolean value describing the type of value stored in the file:
+            # 1 means the data is proportional to the BSDF.
+            # 0 means the data is proportional to the measured intensity or to the probability density function.
+            # Write BRDF sampling data
+            # Number of incident angles and Number of wavelength samples (in nanometer)
+            "%d\t%d\n" % (self.brdf.shape[0], self.brdf.shape[1]),
+            "\t".join(["%.3f" % incidence for incidence in self.__incident_angles]) + "\n",  # List of incident angles
+            "\t".join(["%.1f" % wavelength for wavelength in self.__wavelengths]) + "\n",  # List of wavelength
+        ]
+        export.write("".join(header))
 
         # Write BRDF tables
+        # number of theta and phi samples and phi header are the same for every table
+        table_header = "%d\t%d\n" % np.shape(self.brdf)[2:]
+        table_header += "\t" + "\t".join(["%.3f" % phi for phi in self.__phi_1d_ressampled]) + "\n"
         for incidence in range(len(self.__incident_angles)):
             for wavelength in range(len(self.__wavelengths)):
-                export.write("%f\n" % self.reflectance[incidence, wavelength])  # reflectance
-                export.write("%d\t%d\n" % np.shape(self.brdf)[2:])
-                np.savetxt(
-                    export,
-                    [self.__phi_1d_ressampled],
-                    format("%.3f"),
-                    footer="\n",
-                    newline="",
-                    delimiter="\t",
-                    comments="",
-                    header="\t",
-                )  # phi header
+                export.write("%f\n" % self.reflectance[incidence, wavelength] + table_header)  # reflectance
                 data_with_theta = np.concatenate(
                     (np.array([self.__theta_1d_ressampled]).T, self.brdf[incidence, wavelength, :, :]), axis=1
                 )  # add theta header
@@ -1,7 +1,9 @@
-import math
+import mmap
 import os
 import struct
 
+import numpy as np
+
 from ansys_optical_automation.post_process.dpf_base import DataProcessingFramework
 
 Photopic_Conversion_wavelength = [
@@ -204,6 +206,27 @@ class DpfRayfile(DataProcessingFramework):
     """
 
     conversion_extension = {".ray": ".sdf", ".dat": ".ray", ".sdf": ".ray"}
+    # ray record layouts: x, y, z, l, m, n followed by wavelength and flux in the order of each format
+    speos_ray_columns = [
+        "coordinate_x",
+        "coordinate_y",
+        "coordinate_z",
+        "radiation_l",
+        "radiation_m",
+        "radiation_n",
+        "wavelength",
+        "energy",
+    ]
+    zemax_ray_columns = [
+        "coordinate_x",
+        "coordinate_y",
+        "coordinate_z",
+        "radiation_l",
+        "radiation_m",
+        "radiation_n",
+        "energy",
+        "wavelength",
+    ]
 
     def __init__(self, file_path):
         DataProcessingFramework.__init__(self, extension=list(self.conversion_extension.keys()))
@@ -226,13 +249,12 @@ class DpfRayfile(DataProcessingFramework):
         -------
         Boolean
         """
+        if os.path.getsize(self.file_path) == 0:
+            return False  # empty files cannot be memory mapped
         with open(self.file_path, "rb") as f:
-            for block in f:
-                if b"\0" in block:
-                    f.close()
-                    return True
-            f.close()
-        return False
+            # search the mapped file for a null byte instead of splitting it into pseudo lines
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                return content.find(b"\0") != -1
 
     def __photopic_conversion(self, wavelength):
         """This method computes photopic to Radiometric conversion factor at the given wavelength
@@ -242,26 +264,91 @@ class DpfRayfile(DataProcessingFramework):
         wavelength : int
             wavelength in nm
         """
-        start = 0
-        end = len(Photopic_Conversion_wavelength)
-        pos = 0
-        while start < end:
-            mid = (start + end) // 2
-            # print(mid, Photopic_Conversion_wavelength[mid])
-            if Photopic_Conversion_wavelength[mid] == wavelength:
-                pos = mid
-                break
-            if Photopic_Conversion_wavelength[mid] > wavelength:
-                end = mid
+        return float(np.interp(wavelength, Photopic_Conversion_wavelength, Photopic_Conversion_value))
+
+    def __read_ray_data(self, ray_size):
+        """
+        This method reads all ray records of the rayfile in one block
+
+        Parameters
+        ----------
+        ray_size : int
+            number of float values in one ray record
+
+        Returns
+        -------
+        np.array
+            ray records, one row per ray
+        """
+        content = self.dpf_instance.read(4 * ray_size * self.__ray_numb)
+        return np.frombuffer(content, dtype=np.float32).reshape(-1, ray_size).astype(np.float64)
+
+    def __add_rays(self, ray_geometry, wavelengths, energies):
+        """
+        This method checks the ray records and adds the rays with a non null flux
+
+        Parameters
+        ----------
+        ray_geometry : np.array
+            positions x, y, z and directions l, m, n of the rays, one row per ray
+        wavelengths : list
+            wavelengths of the rays
+        energies : np.array
+            flux of the rays
+        """
+        invalid_wavelengths = np.array(wavelengths) <= 0
+        l_dir, m_dir, n_dir = ray_geometry[:, 3], ray_geometry[:, 4], ray_geometry[:, 5]
+        ray_lengths = np.sqrt(l_dir * l_dir + m_dir * m_dir + n_dir * n_dir)
+        invalid_lengths = np.abs(ray_lengths - 1) > 1e-3
+        invalid_energies = energies < 0
+        # report the first invalid ray, checking wavelength, direction then power like a ray by ray reading
+        invalid_rays = np.flatnonzero(invalid_wavelengths | invalid_lengths | invalid_energies)
+        if invalid_rays.size:
+            ray_idx = invalid_rays[0]
+            if invalid_wavelengths[ray_idx]:
+                msg = "Error: ray wavelength of ray " + str(ray_idx) + " cannot be <= 0"
+            elif invalid_lengths[ray_idx]:
+                raylen = float(ray_lengths[ray_idx])
+                msg = "Error: Vector length of ray " + str(ray_idx) + " is unusual (" + str(raylen) + ")"
+            else:
+                msg = "Error: ray power of ray " + str(ray_idx) + " is < 0"
+            raise ValueError(msg)
+        for ray_idx, (geometry, wav, e) in enumerate(zip(ray_geometry.tolist(), wavelengths, energies.tolist())):
+            if e == 0:
+                print("The " + str(ray_idx) + " th ray has 0 flux! \n This Ray was removed from data")
+                self.__ray_numb -= 1
             else:
-                start = mid + 1
-        pos = pos if pos != 0 else start
+                x, y, z, l_dir, m_dir, n_dir = geometry
+                self.__rays.append(DpfRay(x, y, z, l_dir, m_dir, n_dir, wav, e))
 
-        start_wave = Photopic_Conversion_wavelength[pos]
-        end_wave = Photopic_Conversion_wavelength[pos + 1]
-        start_photopic = Photopic_Conversion_value[pos]
-        end_photopic = Photopic_Conversion_value[pos + 1]
-        return ((wavelength - start_wave) / (end_wave - start_wave)) * (end_photopic - start_photopic) + start_photopic
+    def _pack_rays(self, columns, wavelength_scale=1):
+        """
+        This method packs all ray records into one buffer of 32 bit floats
+
+        Parameters
+        ----------
+        columns : list
+            names of the ray properties in the order of the record, for example ``speos_ray_columns``
+        wavelength_scale : float, optional
+            factor applied to the wavelength, for example 1000 to write it in nanometers. The default is 1.
+
+        Returns
+        -------
+        bytes
+            packed ray records
+        """
+        ray_data = np.array([[getattr(ray, column) for column in columns] for ray in self.rays], dtype=np.float64)
+        ray_data = ray_data.reshape(-1, len(columns))
+        if wavelength_scale != 1:
+            ray_data[:, columns.index("wavelength")] *= wavelength_scale
+        with np.errstate(over="ignore"):
+            packed_data = ray_data.astype(np.float32)
+        # same range check as struct.pack: finite values that do not fit in a 32 bit float are an error
+        overflow = np.flatnonzero((np.isinf(packed_data) & ~np.isinf(ray_data)).any(axis=1))
+        if overflow.size:
+            msg = "Error: ray " + str(overflow[0]) + " has a value too large to be written as a 32 bit float"
+            raise OverflowError(msg)
+        return packed_data.tobytes()
 
     def set_ray_count(self, raynumber):
         """
@@ -297,30 +384,9 @@ class DpfRayfile(DataProcessingFramework):
             self.__watt_value = struct.unpack("f", self.dpf_instance.read(4))[0]
             self.dpf_instance.read(4 * 5)
             self.__lumen_value = struct.unpack("f", self.dpf_instance.read(4))[0]
-            for ray_idx in range(self.__ray_numb):
-                x = struct.unpack("f", self.dpf_instance.read(4))[0]
-                y = struct.unpack("f", self.dpf_instance.read(4))[0]
-                z = struct.unpack("f", self.dpf_instance.read(4))[0]
-                l_dir = struct.unpack("f", self.dpf_instance.read(4))[0]
-                m_dir = struct.unpack("f", self.dpf_instance.read(4))[0]
-                n_dir = struct.unpack("f", self.dpf_instance.read(4))[0]
-                wav = round(struct.unpack("f", self.dpf_instance.read(4))[0] * 0.001, 3)
-                e = struct.unpack("f", self.dpf_instance.read(4))[0]
-                if wav <= 0:
-                    msg = "Error: ray wavelength of ray of " + str(ray_idx) + "cannot be <= 0"
-                    raise ValueError(msg)
-                raylen = math.sqrt(l_dir * l_dir + m_dir * m_dir + n_dir * n_dir)
-                if abs(raylen - 1) > 1e-3:
-                    msg = "Error: Vector length of " + str(ray_idx) + "the ray is unusual (" + str(raylen) + ")"
-                    raise ValueError(msg)
-                if e < 0:
-                    msg = "Error: ray power of " + str(m_dir) + "th ray is < 0"
-                    raise ValueError(msg)
-                elif e == 0:
-                    print("The " + str(ray_idx) + " th ray has 0 flux! \n This Ray was removed from data")
-                    self.__ray_numb -= 1
-                else:
-                    self.__rays.append(DpfRay(x, y, z, l_dir, m_dir, n_dir, wav, e))
+            ray_data = self.__read_ray_data(8)
+            wavelengths = [round(wav * 0.001, 3) for wav in ray_data[:, 6].tolist()]
+            self.__add_rays(ray_data[:, :6], wavelengths, ray_data[:, 7])
             self.dpf_instance.close()
         elif (rayfile_type == "dat" or rayfile_type == "sdf") and self.__binary:
             self.identifier = int.from_bytes(
@@ -376,33 +442,13 @@ class DpfRayfile(DataProcessingFramework):
                 msg = "ray_format_type " + str(ray_format_type) + " is in wrong format"
                 raise TypeError(msg)
 
-            for ray_idx in range(self.__ray_numb):
-                x = struct.unpack("f", self.dpf_instance.read(4))[0]
-                y = struct.unpack("f", self.dpf_instance.read(4))[0]
-                z = struct.unpack("f", self.dpf_instance.read(4))[0]
-                l_dir = struct.unpack("f", self.dpf_instance.read(4))[0]
-                m_dir = struct.unpack("f", self.dpf_instance.read(4))[0]
-                n_dir = struct.unpack("f", self.dpf_instance.read(4))[0]
-                wav = wavelength if wavelength != 0 else 550
-                e = struct.unpack("f", self.dpf_instance.read(4))[0]
-                if ray_format_type == 2:
-                    wav = round(struct.unpack("f", self.dpf_instance.read(4))[0], 3)
-                if wav <= 0:
-                    msg = "Error: ray wavelength cannot be <= 0"
-                    raise ValueError(msg)
-                raylen = math.sqrt(l_dir * l_dir + m_dir * m_dir + n_dir * n_dir)
-                if abs(raylen - 1) > 1e-3:
-                    msg = "Error: Vector length of " + str(m_dir) + "th ray is unusual (" + str(raylen) + ")"
-                    raise ValueError(msg)
-                # Check ray energy:
-                if e < 0:
-                    msg = "Error: ray power of " + str(m_dir) + "th ray is < 0"
-                    raise ValueError(msg)
-                elif e == 0:
-                    print("The " + str(ray_idx) + " the ray has 0 flux! \n This Ray was removed from data")
-                    self.__ray_number -= 1
-                else:
-                    self.__rays.append(DpfRay(x, y, z, l_dir, m_dir, n_dir, wav, e))
+            if ray_format_type == 2:
+                ray_data = self.__read_ray_data(8)
+                wavelengths = [round(wav, 3) for wav in ray_data[:, 7].tolist()]
+            else:
+                ray_data = self.__read_ray_data(7)
+                wavelengths = [wavelength if wavelength != 0 else 550] * len(ray_data)
+            self.__add_rays(ray_data[:, :6], wavelengths, ray_data[:, 6])
             self.dpf_instance.close()
         else:
             if not self.__binary:
@@ -509,15 +555,8 @@ class DpfRayfile(DataProcessingFramework):
         zemax_spectrum_file.write(struct.pack("<I", 0))  # flux_type is Watts
         zemax_spectrum_file.write(struct.pack("<I", 0))  # reversed1 (int)
         zemax_spectrum_file.write(struct.pack("<I", 0))  # reversed2 (int)
-        for ray in self.rays:
-            zemax_spectrum_file.write(struct.pack("f", ray.coordinate_x))  # x
-            zemax_spectrum_file.write(struct.pack("f", ray.coordinate_y))  # y
-            zemax_spectrum_file.write(struct.pack("f", ray.coordinate_z))  # z
-            zemax_spectrum_file.write(struct.pack("f", ray.radiation_l))  # l
-            zemax_spectrum_file.write(struct.pack("f", ray.radiation_m))  # m
-            zemax_spectrum_file.write(struct.pack("f", ray.radiation_n))  # n
-            zemax_spectrum_file.write(struct.pack("f", ray.energy))  # flux (Watts)
-            zemax_spectrum_file.write(struct.pack("f", ray.wavelength))  # wavelength
+        # x, y, z, l, m, n, flux (Watts), wavelength for every ray
+        zemax_spectrum_file.write(self._pack_rays(self.zemax_ray_columns))
         zemax_spectrum_file.close()
 
     def export_to_speos(self):
@@ -538,15 +577,8 @@ class DpfRayfile(DataProcessingFramework):
         speos_ray_file.write(struct.pack("f", 2.0))
         speos_ray_file.write(struct.pack("f", 2.0))
         speos_ray_file.write(struct.pack("f", self.photometric_power))
-        for ray in self.rays:
-            speos_ray_file.write(struct.pack("f", ray.coordinate_x))
-            speos_ray_file.write(struct.pack("f", ray.coordinate_y))
-            speos_ray_file.write(struct.pack("f", ray.coordinate_z))
-            speos_ray_file.write(struct.pack("f", ray.radiation_l))
-            speos_ray_file.write(struct.pack("f", ray.radiation_m))
-            speos_ray_file.write(struct.pack("f", ray.radiation_n))
-            speos_ray_file.write(struct.pack("f", ray.wavelength * 1000))
-            speos_ray_file.write(struct.pack("f", ray.energy))
+        # x, y, z, l, m, n, wavelength (nm), flux for every ray
+        speos_ray_file.write(self._pack_rays(self.speos_ray_columns, wavelength_scale=1000))
         speos_ray_file.close()
 
     def export_file(self, export_folder_dir=None, convert=False):
@@ -1,6 +1,8 @@
 import os
 import sys
 
+import numpy as np
+
 from ansys_optical_automation.lumerical_core.utils import get_lumerical_install_location
 
 
@@ -63,20 +65,18 @@ class DpfStack:
         write_out.write("OPTIS-Coated surface file v1.0\n")
         write_out.write("Coating surface\n")
         write_out.write(str(len(self.rt_theta)) + " " + str(len(self.rt_lambda)) + "\n\t")
-        for wavelength in self.rt_lambda:
-            write_out.write("%9.3f " % (wavelength[0] * 10e8))
-        write_out.write("\n")
+        write_out.write("".join(["%9.3f " % (wavelength[0] * 10e8) for wavelength in self.rt_lambda]) + "\n")
 
+        lambda_indices = range(len(self.rt_lambda))
         for theta_idx, theta in enumerate(self.rt_theta):
-            write_out.write("%3.2f " % theta[0])
-            for lambda_idx, lambda_value in enumerate(self.rt_lambda):
-                write_out.write("%3.2f " % self.R[lambda_idx, 0, theta_idx])
-                write_out.write("%3.2f " % self.T[lambda_idx, 0, theta_idx])
-            write_out.write("\n\t")
-            for lambda_idx, lambda_value in enumerate(self.rt_lambda):
-                write_out.write("%3.2f " % self.R[lambda_idx, 1, theta_idx])
-                write_out.write("%3.2f " % self.T[lambda_idx, 1, theta_idx])
-            write_out.write("\n")
+            # one formatted line per polarization, p first then s
+            line_p = "".join(
+                ["%3.2f %3.2f " % (self.R[idx, 0, theta_idx], self.T[idx, 0, theta_idx]) for idx in lambda_indices]
+            )
+            line_s = "".join(
+                ["%3.2f %3.2f " % (self.R[idx, 1, theta_idx], self.T[idx, 1, theta_idx]) for idx in lambda_indices]
+            )
+            write_out.write("%3.2f " % theta[0] + line_p + "\n\t" + line_s + "\n")
         write_out.close()
 
     def _save_stack_to_zemax(self):
@@ -87,26 +87,25 @@ class DpfStack:
         write_out.write("! Lumerical stack coating data\n")
         write_out.write("TABLE LUMERICAL_STACK\n")
 
+        wavelengths = np.asarray(self.rt_lambda)[:, 0] * 1e6
         for theta_idx, theta in enumerate(self.rt_theta):
             write_out.write("ANGL %3.2f\n" % theta[0])
-            for lambda_idx, lambda_value in enumerate(self.rt_lambda):
-                write_out.write(
-                    "WAVE %8.6f %8.6f %8.6f %8.6f %8.6f\n"
-                    % (
-                        lambda_value[0] * 1e6,
-                        self.R[lambda_idx, 1, theta_idx] / 100,  # Rs
-                        self.R[lambda_idx, 0, theta_idx] / 100,  # Rp
-                        self.T[lambda_idx, 1, theta_idx] / 100,  # Ts
-                        self.T[lambda_idx, 0, theta_idx] / 100,  # Tp
-                    )
+            # one WAVE line per wavelength, formatted by numpy for the whole angle at once
+            wave_lines = np.column_stack(
+                (
+                    wavelengths,
+                    self.R[:, 1, theta_idx] / 100,  # Rs
+                    self.R[:, 0, theta_idx] / 100,  # Rp
+                    self.T[:, 1, theta_idx] / 100,  # Ts
+                    self.T[:, 0, theta_idx] / 100,  # Tp
                 )
+            )
+            np.savetxt(write_out, wave_lines, fmt="WAVE %8.6f %8.6f %8.6f %8.6f %8.6f")
         write_out.write("\n")
         write_out.close()
 
     def _organize_data_for_output(self):
         """Retrieve data from stack result file."""
-        import numpy as np
-
         Rp = None
         Tp = None
         Rs = None
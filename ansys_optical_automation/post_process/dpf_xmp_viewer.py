@@ -246,9 +246,7 @@ class MapStruct:
                     if wl != 0:
                         file_export.writelines("\n")
                     for y in range(self.yNb):
-                        for x in range(self.xNb):
-                            file_export.writelines(str(self.data[i, x, y, wl]) + "\t")
-                        file_export.writelines("\n")
+                        file_export.writelines("\t".join(map(str, self.data[i, :, y, wl])) + "\t\n")
         elif self.map_type == 2 and self.wl_res is None:
             str_layer = ""
             for i in range(self.layers):
@@ -260,18 +258,8 @@ class MapStruct:
                 else:
                     file_export.writelines("layer" + str(i) + "\n")
                 for y in range(self.yNb):
-                    for x in range(self.xNb):
-                        file_export.writelines(
-                            str(self.data[i, x, y, 0])
-                            + "\t"
-                            + str(self.data[i, x, y, 1])
-                            + "\t"
-                            + str(self.data[i, x, y, 2])
-                            + "\t"
-                            + str(self.data[i, x, y, 3])
-                            + "\t"
-                        )
-                    file_export.writelines("\n")
+                    # x major, then the four colorimetric values of each pixel
+                    file_export.writelines("\t".join(map(str, self.data[i, :, y, 0:4].ravel())) + "\t\n")
         elif self.map_type == 3 and self.wl_res is not None:
             for i in range(self.layers):
                 if type(self.layer_name[i]) == str:
@@ -282,9 +270,7 @@ class MapStruct:
                     if wl != 0:
                         file_export.writelines("\n")
                     for y in range(self.yNb):
-                        for x in range(self.xNb):
-                            file_export.writelines(str(self.data[i, x, y, wl]) + "\t")
-                        file_export.writelines("\n")
+                        file_export.writelines("\t".join(map(str, self.data[i, :, y, wl])) + "\t\n")
         elif self.map_type == 3 and self.wl_res is None:
             for i in range(self.layers):
                 if type(self.layer_name[i]) == str:
@@ -292,9 +278,7 @@ class MapStruct:
                 else:
                     file_export.writelines("layer" + str(i) + "\n")
                 for y in range(self.yNb):
-                    for x in range(self.xNb):
-                        file_export.writelines(str(self.data[i, x, y, 0]) + "\t")
-                    file_export.writelines("\n")
+                    file_export.writelines("\t".join(map(str, self.data[i, :, y, 0])) + "\t\n")
         file_export.close()
 
     def export_to_xmp(self, export_path=r"C:\temp"):
@@ -15,6 +15,48 @@ class VersionError(KeyError):
 
 
 class BaseSCDM(object):
+    # every attribute set in __init__ must be listed here: Simulation declares __slots__ too and has no
+    # instance __dict__, so a missing name makes its construction fail with AttributeError.
+    # Subclasses without __slots__ still get an instance __dict__.
+    __slots__ = (
+        "Color",
+        "List",
+        "scdm_api",
+        "AnchorCondition",
+        "BodySelection",
+        "CloseDocument",
+        "ColorHelper",
+        "Command",
+        "ComponentHelper",
+        "ComponentExtensions",
+        "Copy",
+        "CreateNewDocument",
+        "Delete",
+        "DesignBodyExtensions",
+        "DocumentSave",
+        "DocumentInsert",
+        "FixDuplicateFaces",
+        "GetActiveDocument",
+        "GetOriginal",
+        "GetRootPart",
+        "IComponent",
+        "ICoordinateAxis",
+        "ICoordinateSystem",
+        "IDesignBody",
+        "IDesignMesh",
+        "IDesignCurve",
+        "IPart",
+        "Layers",
+        "NamedSelection",
+        "Paste",
+        "PartExtensions",
+        "Selection",
+        "SetName",
+        "StitchFaces",
+        "ViewHelper",
+        "Window",
+    )
+
     def __init__(self, SpaceClaim, supported_versions=None):
         """
         Base class that contains all commonly used objects. This class serves more as an abstract class.
@@ -1,15 +1,44 @@
+import itertools
+import logging
 import os
+import subprocess
+import time
 
 from ansys_optical_automation.scdm_core.base import BaseSCDM
+from ansys_optical_automation.scdm_core.utils import get_speos_core
 from ansys_optical_automation.scdm_process.preprocessing_library import PreProcessingASP
 
+logger = logging.getLogger(__name__)
+
 
 class Simulation(BaseSCDM):
     """
     Provides methods for creating, modifying, and running Speos simulations.
     """
 
-    def __init__(self, name, SpeosSim, SpaceClaim, kind="inverse"):
+    # slots keep the footprint of the many simulations of a parameter sweep small
+    __slots__ = (
+        "_space_claim",
+        "_preproc",
+        "_batch",
+        "speos_sim",
+        "_sensor_finders",
+        "name",
+        "_grid_name_prefix",
+        "_projected_grid_cache",
+        "_exported_grids",
+        "kind",
+        "rays",
+        "computed",
+        "grid",
+        "my_bodies",
+        "_defined_bodies",
+        "_defined_geometries_count",
+        "object",
+        "component_list",
+    )
+
+    def __init__(self, name, SpeosSim, SpaceClaim, kind="inverse", reuse=True, batch=None):
         """
         Initialize the ``Simulation`` class. Takes name as the input and searches for an
         existing simulation with this name.
@@ -24,52 +53,69 @@ class Simulation(BaseSCDM):
             SpaceClaim
         kind : str, optional
             Type of the simulation. Options are ``"inverse"``, ``"direct"``, and ``"interactive"``.
+        reuse : bool, optional
+            Whether to search for an existing simulation with this name before creating a new one.
+            The default is ``True``.
+        batch : SimulationBatch, optional
+            Batch whose root part traversal is shared with this simulation. The default is ``None``.
         """
+        if kind not in ("inverse", "direct", "interactive"):
+            msg = "Unknown simulation kind: {}".format(kind)
+            raise ValueError(msg)
         super(Simulation, self).__init__(SpaceClaim, ["V19", "V20", "V21", "V22", "V23"])
-        self.PreProcASP = PreProcessingASP(SpaceClaim)
+        self._space_claim = SpaceClaim
+        self._preproc = None
+        self._batch = batch
         self.speos_sim = SpeosSim
+        self._sensor_finders = (
+            self.speos_sim.SensorCamera,
+            self.speos_sim.SensorRadiance,
+            self.speos_sim.SensorIrradiance,
+            self.speos_sim.SensorIntensity,
+        )
         self.name = name
+        self._grid_name_prefix = name + "."
+        self._projected_grid_cache = {}
+        self._exported_grids = {}
         self.kind = kind
         self.rays = 10
         self.computed = False
         self.grid = None
         self.my_bodies = []
-        if kind == "inverse":
-            sim = self.speos_sim.SimulationInverse.Find(name)
-            if sim:
-                self.object = sim
-                for body in self.object.Geometries.LinkedObjects:
-                    self.my_bodies.append(self.convert_object_version(body))
-            else:
-                self.object = self.speos_sim.SimulationInverse.Create()
-                self.object.Name = name
-
-        elif kind == "direct":
-            sim = self.speos_sim.SimulationDirect.Find(name)
-            if sim:
-                self.object = sim
-                for body in self.object.Geometries.LinkedObjects:
-                    self.my_bodies.append(self.convert_object_version(body))
-            else:
-                self.object = self.speos_sim.SimulationDirect.Create()
-                self.object.Name = name
-
-        elif kind == "interactive":
-            sim = self.speos_sim.SimulationInteractive.Find(name)
-            if sim:
-                self.object = sim
-                for body in self.object.Geometries.LinkedObjects:
-                    self.my_bodies.append(self.convert_object_version(body))
-            else:
-                self.object = self.speos_sim.SimulationInteractive.Create()
-                self.object.Name = name
-
+        self._defined_bodies = None
+        self._defined_geometries_count = None
+        simulation_types = {
+            "inverse": self.speos_sim.SimulationInverse,
+            "direct": self.speos_sim.SimulationDirect,
+            "interactive": self.speos_sim.SimulationInteractive,
+        }
+        simulation_type = simulation_types[kind]
+        sim = simulation_type.Find(name) if reuse else None
+        if sim:
+            self.object = sim
+            for body in self.object.Geometries.LinkedObjects:
+                self.my_bodies.append(self.convert_object_version(body))
         else:
-            # TODO throw an error: unknown simulation type
-            pass
+            self.object = simulation_type.Create()
+            self.object.Name = name
 
         self.component_list = []
 
+    @property
+    def PreProcASP(self):
+        """
+        Preprocessing library of the simulation, created on first use.
+
+        Returns
+        -------
+        PreProcessingASP
+        """
+        if self._batch is not None:
+            return self._batch.PreProcASP
+        if self._preproc is None:
+            self._preproc = PreProcessingASP(self._space_claim)
+        return self._preproc
+
     def select_geometries(self, component_list):
         """
         Add all Mesh bodies and Design bodies from components provided in a component list to the simulation's list
@@ -81,14 +127,21 @@ class Simulation(BaseSCDM):
             List with component names. For example, ``["part1", "part2"]``.
         """
         self.component_list = component_list
-        root = self.GetRootPart()
-        all_components = root.GetDescendants[self.IComponent]()
+        component_set = set(component_list)
+        if self._batch is not None:
+            all_components = self._batch.all_components
+        else:
+            root = self.GetRootPart()
+            all_components = root.GetDescendants[self.IComponent]()
+        # resolve the generic type arguments once instead of per component
+        body_type = self.IDesignBody
+        mesh_type = self.IDesignMesh
+        body_iters = []
         for component in all_components:
-            if component.Content.Master.DisplayName in self.component_list:
-                bodies = component.GetDescendants[self.IDesignBody]()
-                self.my_bodies.extend(bodies)
-                bodies = component.GetDescendants[self.IDesignMesh]()
-                self.my_bodies.extend(bodies)
+            if component.Content.Master.DisplayName in component_set:
+                body_iters.append(component.GetDescendants[body_type]())
+                body_iters.append(component.GetDescendants[mesh_type]())
+        self.my_bodies.extend(itertools.chain.from_iterable(body_iters))
         return self
 
     def select_geometrical_sets(self, geosets_list):
@@ -101,25 +154,47 @@ class Simulation(BaseSCDM):
         geosets_list : list
             List with the names of Catia geometrical sets to add. For example, ``["geo_set1", "geo_set2"]``.
         """
-        part_geosets = self.PreProcASP._PreProcessingASP__create_geometrical_set_names_list(
-            self.GetRootPart(), bodies_only=False
-        )
-        for geoset in geosets_list:
-            if geoset in part_geosets:
-                part_geosets_dict = self.PreProcASP._PreProcessingASP__convert_list_to_dict(
-                    self.GetRootPart(), bodies_only=False
-                )
-                bodies = part_geosets_dict[geoset]
-                self.my_bodies.extend(bodies)
+        part_geosets_dict = self.__get_part_geosets_dict()
+        body_iters = [part_geosets_dict[geoset] for geoset in geosets_list if geoset in part_geosets_dict]
+        self.my_bodies.extend(itertools.chain.from_iterable(body_iters))
         return self
 
-    def define_geometries(self):
+    def __get_part_geosets_dict(self):
+        """
+        Get the dictionary of geometrical set names and bodies of the root part.
+        The dictionary is built on each call so that geometrical sets added to the document are found,
+        except for simulations of a batch, which share the dictionary of the batch.
+
+        Returns
+        -------
+        dict
+            Dictionary with an index of geometrical set names and values for a list of bodies.
+        """
+        if self._batch is not None:
+            return self._batch.part_geosets_dict
+        return self.PreProcASP._PreProcessingASP__convert_list_to_dict(self.GetRootPart(), bodies_only=False)
+
+    def define_geometries(self, extra_bodies=None):
         """
         Add all bodies from the simulation's list of bodies (self.my_bodies) to the
         simulation geometries. This works Like the green ``validate`` button in Speos.
+        The geometries are set in a single call. They are set again only if the list of bodies differs from the one
+        set last time, including direct edits of self.my_bodies, or if the number of simulation geometries changed
+        in the meantime, for example after edits in Speos.
+
+        Parameters
+        ----------
+        extra_bodies : list, optional
+            Bodies to add to the simulation's list of bodies before setting the geometries.
+            The default is ``None``.
         """
-        selection = self.Selection.Create(self.my_bodies)
-        self.object.Geometries.Set(selection.Items)
+        if extra_bodies:
+            self.my_bodies.extend(extra_bodies)
+        if self.my_bodies != self._defined_bodies or self.object.Geometries.Count != self._defined_geometries_count:
+            selection = self.Selection.Create(self.my_bodies)
+            self.object.Geometries.Set(selection.Items)
+            self._defined_bodies = list(self.my_bodies)
+            self._defined_geometries_count = self.object.Geometries.Count
         return self
 
     def set_rays_limit(self, rays):
@@ -150,36 +225,71 @@ class Simulation(BaseSCDM):
         sensor_name : str
             Name of the sensor with the grid to import as a geometry.
         """
-        grid_name = ".".join([self.name, sensor_name, "OPTProjectedGrid"])
-        print(grid_name)
+        grid_name = self._grid_name_prefix + sensor_name + ".OPTProjectedGrid"
+        logger.debug("export projected grid %s", grid_name)
         if self.kind == "interactive" and self.computed:
-            projected_grid = self.speos_sim.ResultProjectedGrid.Find(grid_name)
-            print(projected_grid)
+            projected_grid = self.__find_projected_grid(grid_name)
+            logger.debug("found projected grid %s", projected_grid)
+            nb_grids = len(self.PreProcASP.find_component("Projected grid_"))
             projected_grid.ExportProjectedGridAsGeometry()
+            # the exported grid components are added after the existing ones, keep them for save_grids
+            exported_grids = self.PreProcASP.find_component("Projected grid_")[nb_grids:]
+            self._exported_grids.setdefault(sensor_name, []).extend(exported_grids)
         return self
 
     def save_grid(self, sensor_name, save_name):
         """
         # TODO Save components in the main script in SpaceClaim.
         """
-        grid_name = ".".join([self.name, sensor_name, "OPTProjectedGrid", "CATPart"])
+        grid_name = self._grid_name_prefix + sensor_name + ".OPTProjectedGrid.CATPart"
         # find the created component
         components = self.PreProcASP.find_component("Projected grid_")
         component = components[len(components) - 1]
         # save the created component as CATPart
         # grid_name = "Projected grid_"
         # self.ComponentHelper.ImportComponentGroups(component)
-        self.Copy.ToClipboard(self.Selection.Create(component))
-        self.CreateNewDocument()
-        self.Paste.FromClipboard()
-        # options = ExportOptions.Create()
-        self.DocumentSave.Execute(grid_name)
-        self.CloseDocument()
+        self.__save_components(component, grid_name)
 
         # delete the created component
         # result = self.Delete.Execute(self.Selection.Create(component))
         return self
 
+    def save_grids(self, sensor_name):
+        """
+        Save all projected grids this simulation exported for a sensor into a single CATPart,
+        for example after several runs of a parameter sweep.
+        All grids go through one new document instead of one document per grid.
+        Grids exported by other simulations of the document are not saved.
+
+        Parameters
+        ----------
+        sensor_name : str
+            Name of the sensor whose grids were exported with ``export_grid``.
+        """
+        grid_name = self._grid_name_prefix + sensor_name + ".OPTProjectedGrid.CATPart"
+        components = self._exported_grids.get(sensor_name, [])
+        if components:
+            self.__save_components(components, grid_name)
+        return self
+
+    def __save_components(self, components, file_name):
+        """
+        Save components into a new document.
+
+        Parameters
+        ----------
+        components : SpaceClaim Component or list
+            Component or list of components to save.
+        file_name : str
+            Name of the saved file.
+        """
+        self.Copy.ToClipboard(self.Selection.Create(components))
+        self.CreateNewDocument()
+        self.Paste.FromClipboard()
+        # options = ExportOptions.Create()
+        self.DocumentSave.Execute(file_name)
+        self.CloseDocument()
+
     def set_grid_params(self, primary_step=20, secondary_step=4, max_distance=1500, max_incidence=89, min_distance=2):
         """
         Set the parameters of the projected grid for the generated camera.
@@ -200,9 +310,9 @@ class Simulation(BaseSCDM):
             by a line. The default is ``2``.
         """
         sensor_name = self.object.Sensors[0].Name
-        grid_name = self.name + "." + sensor_name + ".OPTProjectedGrid"
-        print(grid_name)
-        grid = self.speos_sim.ResultProjectedGrid.Find(grid_name)
+        grid_name = self._grid_name_prefix + sensor_name + ".OPTProjectedGrid"
+        logger.debug("set parameters of projected grid %s", grid_name)
+        grid = self.__find_projected_grid(grid_name)
         if grid:
             self.grid = grid
             grid.SecondaryStep = secondary_step
@@ -212,12 +322,53 @@ class Simulation(BaseSCDM):
             grid.MinDistanceTolerance = min_distance
         return self
 
+    def __find_projected_grid(self, grid_name):
+        """
+        Find a projected grid result. Found grids are kept until the simulation is run again.
+
+        Parameters
+        ----------
+        grid_name : str
+            Name of the projected grid result.
+
+        Returns
+        -------
+        SpeosSim.ResultProjectedGrid
+            Projected grid result or ``None`` if it is not found.
+        """
+        if grid_name not in self._projected_grid_cache:
+            projected_grid = self.speos_sim.ResultProjectedGrid.Find(grid_name)
+            if not projected_grid:
+                return projected_grid
+            self._projected_grid_cache[grid_name] = projected_grid
+        return self._projected_grid_cache[grid_name]
+
     def run_simulation(self):
         """Run a simulation on the local CPU."""
         self.object.Compute()
         self.computed = True
+        # the computation replaces the previous results
+        self._projected_grid_cache.clear()
         return self
 
+    def run_async(self, speos_version):
+        """
+        Export the simulation and start it in a separate Speos Core process without waiting for the result.
+
+        Parameters
+        ----------
+        speos_version : int
+            Ansys version of the Speos Core to use. For example, ``222`` for 2022 R2.
+
+        Returns
+        -------
+        subprocess.Popen
+            Handle of the running Speos Core process.
+        """
+        sim_path = self.linked_export_simulation()
+        command = [get_speos_core(speos_version), r"-C", r"-S", r"0000", sim_path]
+        return subprocess.Popen(command)
+
     def add_sensor(self, sensor_name):
         """
         Add a sensor to the simulation.
@@ -227,22 +378,12 @@ class Simulation(BaseSCDM):
         sensor_name : str
             Name of the sensor.
         """
-        # camera sensor
-        sensor_object = self.speos_sim.SensorCamera.Find(sensor_name)
-        if sensor_object:
-            self.object.Sensors.Set(sensor_object)
-        # radiance sensor
-        sensor_object = self.speos_sim.SensorRadiance.Find(sensor_name)
-        if sensor_object:
-            self.object.Sensors.Set(sensor_object)
-        # irradiance sensor
-        sensor_object = self.speos_sim.SensorIrradiance.Find(sensor_name)
-        if sensor_object:
-            self.object.Sensors.Set(sensor_object)
-        # intensity sensor
-        sensor_object = self.speos_sim.SensorIntensity.Find(sensor_name)
-        if sensor_object:
-            self.object.Sensors.Set(sensor_object)
+        # camera, radiance, irradiance and intensity sensors, stop at the first match
+        for finder in self._sensor_finders:
+            sensor_object = finder.Find(sensor_name)
+            if sensor_object:
+                self.object.Sensors.Set(sensor_object)
+                break
         return self
 
     def linked_export_simulation(self):
@@ -268,3 +409,155 @@ class Simulation(BaseSCDM):
             save_path, r"SPEOS isolated files", os.path.basename(doc_path).split(".")[0], export_name, export_name
         )
         return sim_path
+
+
+class SimulationBatch(BaseSCDM):
+    """
+    Provides a set of simulations of the same document, for example for a parameter sweep.
+    The root part traversal needed to select geometries is done once and shared by all simulations of the batch.
+    Create a new batch when components or geometrical sets of the document change.
+    """
+
+    def __init__(self, SpeosSim, SpaceClaim):
+        """
+        Initialize the ``SimulationBatch`` class.
+
+        Parameters
+        ----------
+        SpeosSim : SpeosSim
+            SpeosSim.
+        SpaceClaim : SpaceClaim
+            SpaceClaim
+        """
+        super(SimulationBatch, self).__init__(SpaceClaim, ["V19", "V20", "V21", "V22", "V23"])
+        self._space_claim = SpaceClaim
+        self._preproc = None
+        self._part_geosets_dict = None
+        self.speos_sim = SpeosSim
+        self.root = self.GetRootPart()
+        self.all_components = list(self.root.GetDescendants[self.IComponent]())
+        self.simulations = []
+
+    @property
+    def PreProcASP(self):
+        """
+        Preprocessing library shared by the simulations of the batch, created on first use.
+
+        Returns
+        -------
+        PreProcessingASP
+        """
+        if self._preproc is None:
+            self._preproc = PreProcessingASP(self._space_claim)
+        return self._preproc
+
+    @property
+    def part_geosets_dict(self):
+        """
+        Dictionary of geometrical set names and bodies of the root part, created on first use.
+
+        Returns
+        -------
+        dict
+            Dictionary with an index of geometrical set names and values for a list of bodies.
+        """
+        if self._part_geosets_dict is None:
+            self._part_geosets_dict = self.PreProcASP._PreProcessingASP__convert_list_to_dict(
+                self.root, bodies_only=False
+            )
+        return self._part_geosets_dict
+
+    def add_run(self, name, kind="inverse", reuse=True):
+        """
+        Find or create a simulation sharing the root part traversal of the batch.
+
+        Parameters
+        ----------
+        name : str
+            Name of the simulation to find or create.
+        kind : str, optional
+            Type of the simulation. Options are ``"inverse"``, ``"direct"``, and ``"interactive"``.
+        reuse : bool, optional
+            Whether to search for an existing simulation with this name before creating a new one.
+            The default is ``True``.
+
+        Returns
+        -------
+        Simulation
+        """
+        simulation = Simulation(name, self.speos_sim, self._space_claim, kind, reuse, batch=self)
+        self.simulations.append(simulation)
+        return simulation
+
+    def run(self, speos_version, max_workers=None):
+        """
+        Run all simulations of the batch in parallel Speos Core processes.
+
+        Parameters
+        ----------
+        speos_version : int
+            Ansys version of the Speos Core to use. For example, ``222`` for 2022 R2.
+        max_workers : int, optional
+            Maximum number of simulations running at the same time. The default is ``None``,
+            which starts all simulations at once.
+
+        Returns
+        -------
+        list
+            List of the simulations of the batch.
+        """
+        return run_simulations(self.simulations, speos_version, max_workers)
+
+
+def run_simulations(simulations, speos_version, max_workers=None):
+    """
+    Run independent simulations in parallel Speos Core processes.
+
+    Parameters
+    ----------
+    simulations : list
+        List of ``Simulation`` objects to run. Interactive simulations can't be exported, a ``ValueError`` is raised
+        before any simulation is started if the list contains one.
+    speos_version : int
+        Ansys version of the Speos Core to use. For example, ``222`` for 2022 R2.
+    max_workers : int, optional
+        Maximum number of simulations running at the same time. The default is ``None``,
+        which starts all simulations at once.
+
+    Returns
+    -------
+    list
+        List of the simulations. ``computed`` is set to ``True`` for the simulations that finished successfully.
+    """
+    for simulation in simulations:
+        if simulation.kind == "interactive":
+            msg = "Interactive simulation {} can't be run in a Speos Core process".format(simulation.name)
+            raise ValueError(msg)
+    if max_workers is None:
+        max_workers = max(len(simulations), 1)
+    elif max_workers < 1:
+        msg = "max_workers must be greater than 0"
+        raise ValueError(msg)
+    pending = list(simulations)
+    running = []
+    try:
+        while pending or running:
+            while pending and len(running) < max_workers:
+                simulation = pending.pop(0)
+                running.append((simulation, simulation.run_async(speos_version)))
+            still_running = []
+            for simulation, process in running:
+                if process.poll() is None:
+                    still_running.append((simulation, process))
+                else:
+                    simulation.computed = process.returncode == 0
+            running = still_running
+            if running:
+                time.sleep(0.1)
+    except BaseException:
+        # do not leave Speos Core processes behind when a simulation fails to start or the run is interrupted
+        for simulation, process in running:
+            process.terminate()
+            process.wait()
+        raise
+    return simulations
@@ -98,3 +98,66 @@ class TestSimAPI:
         res = self.results.get("number_of_passes", None)
         ref = self.reference_results["number_of_passes"]
         assert res == ref
+
+    def test_06_test_unknown_kind(self):
+        """
+        Verify that an unknown simulation kind is rejected.
+        Returns: None
+        """
+        res = self.results.get("unknown_kind_rejected", None)
+        ref = self.reference_results["unknown_kind_rejected"]
+        assert res == ref
+
+    def test_07_test_interactive_run(self):
+        """
+        Verify that ``run_simulations`` rejects interactive simulations before starting any run.
+        Returns: None
+        """
+        res = self.results.get("interactive_run_rejected", None)
+        ref = self.reference_results["interactive_run_rejected"]
+        assert res == ref
+
+    def test_08_test_batch_run(self):
+        """
+        Compare the results of the ``SimulationBatch.run`` method.
+        Returns: None
+        """
+        res = self.results.get("batch_run_computed", None)
+        ref = self.reference_results["batch_run_computed"]
+        assert res == ref
+
+    def test_09_test_batch_selection(self):
+        """
+        Compare the bodies selected by a ``SimulationBatch`` simulation with a single simulation.
+        Returns: None
+        """
+        res = self.results.get("batch_selection_matches", None)
+        ref = self.reference_results["batch_selection_matches"]
+        assert res == ref
+
+    def test_10_test_slots(self):
+        """
+        Verify that all ``Simulation`` attributes are declared in ``__slots__``.
+        Returns: None
+        """
+        res = self.results.get("simulation_has_no_dict", None)
+        ref = self.reference_results["simulation_has_no_dict"]
+        assert res == ref
+
+    def test_11_test_invalid_max_workers(self):
+        """
+        Verify that ``SimulationBatch.run`` rejects a number of workers lower than 1.
+        Returns: None
+        """
+        res = self.results.get("invalid_max_workers_rejected", None)
+        ref = self.reference_results["invalid_max_workers_rejected"]
+        assert res == ref
+
+    def test_12_test_failed_start_cleanup(self):
+        """
+        Verify that ``run_simulations`` stops the started processes when a simulation fails to start.
+        Returns: None
+        """
+        res = self.results.get("failed_start_cleaned_up", None)
+        ref = self.reference_results["failed_start_cleaned_up"]
+        assert res == ref
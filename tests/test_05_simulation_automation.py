@@ -168,3 +168,12 @@ class TestSimAutomation:
         """
         res = self.results.get("exported", None)
         assert res is True
+
+    def test_13_grids_saved(self):
+        """
+        Compare the result of the ``Simulation.save_grids`` method.
+        Returns: None
+        """
+        res = self.results.get("grids_saved", None)
+        ref = self.reference_results["grids_saved"]
+        assert res == ref
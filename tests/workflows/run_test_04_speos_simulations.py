@@ -1,5 +1,6 @@
 import json
 import os
+import shutil
 import sys
 import traceback
 
@@ -9,15 +10,46 @@ lib_path = os.path.dirname(unittest_path)  # get path of speos_migration library
 sys.path.append(lib_path)
 
 from ansys_optical_automation.speos_process.speos_simulations import Simulation
+from ansys_optical_automation.speos_process.speos_simulations import SimulationBatch
+from ansys_optical_automation.speos_process.speos_simulations import run_simulations
+from tests.config import SCDM_VERSION
 
 scdm_file = os.path.join(unittest_path, "workflows", "example_models", "test_geometry_01.scdocx")
+scdm_file_2 = os.path.join(unittest_path, "workflows", "example_models", "test_05_simexport.scdocx")
 results_json = os.path.join(unittest_path, "workflows", "test_04_results.json")
+isolated_dir = os.path.join(unittest_path, "workflows", "example_models", "SPEOS isolated files")
 
 test_geometries = ["Component1"]
 test_geoset = ["Component1"]
 interactive_geoset = ["Plane"]
 
 
+class RecordedRun(object):
+    """Simulation wrapper keeping the Speos Core process started by run_async."""
+
+    def __init__(self, simulation):
+        self.simulation = simulation
+        self.kind = simulation.kind
+        self.name = simulation.name
+        self.computed = False
+        self.process = None
+
+    def run_async(self, speos_version):
+        self.process = self.simulation.run_async(speos_version)
+        return self.process
+
+
+class FailingRun(object):
+    """Simulation stand-in whose Speos Core process can't be started."""
+
+    kind = "inverse"
+    name = "Test_failing_run"
+    computed = False
+
+    def run_async(self, speos_version):
+        raise RuntimeError("Speos Core could not be started")
+
+
 def main():
     DocumentOpen.Execute(scdm_file)
     # create a simulation
@@ -26,6 +58,8 @@ def main():
     sim_object = SpeosSim.SimulationInverse.Find("Test_simulation")
     sim_exists = bool(sim_object)
     results_dict["simulation_created"] = sim_exists
+    # all attributes are declared in __slots__
+    results_dict["simulation_has_no_dict"] = not hasattr(simulation, "__dict__")
 
     # select geometries in the geoset
     simulation.select_geometrical_sets(test_geoset)
@@ -48,6 +82,56 @@ def main():
     num_of_passes = int(simulation.object.NbPassesLimit.ToString())
     results_dict["number_of_passes"] = num_of_passes
 
+    # unknown simulation kind
+    try:
+        Simulation("Test_unknown_simulation", SpeosSim, SpaceClaim, "unknown")
+        results_dict["unknown_kind_rejected"] = False
+    except ValueError:
+        results_dict["unknown_kind_rejected"] = True
+
+    # simulations of a batch select the same bodies as a single simulation
+    batch = SimulationBatch(SpeosSim, SpaceClaim)
+    batch_simulation = batch.add_run("Test_batch_simulation", "inverse").select_geometries(test_geometries)
+    single_simulation = Simulation("Test_single_simulation", SpeosSim, SpaceClaim, "inverse")
+    single_simulation.select_geometries(test_geometries)
+    results_dict["batch_selection_matches"] = len(batch_simulation.my_bodies) == len(single_simulation.my_bodies)
+
+    # interactive simulations can't run in Speos Core, nothing is started
+    interactive = Simulation("Test_interactive_simulation", SpeosSim, SpaceClaim, "interactive")
+    try:
+        run_simulations([simulation, interactive], SCDM_VERSION)
+        results_dict["interactive_run_rejected"] = False
+    except ValueError:
+        results_dict["interactive_run_rejected"] = not simulation.computed
+
+    # run the exportable simulations of a document in parallel
+    GetActiveWindow().Close()
+    DocumentOpen.Execute(scdm_file_2)
+    batch = SimulationBatch(SpeosSim, SpaceClaim)
+    for item in Selection.CreateByGroups("Sim").Items:
+        name = item.GetName()
+        kind = "direct" if SpeosSim.SimulationDirect.Find(name) else "inverse"
+        batch.add_run(name, kind)
+    batch.run(SCDM_VERSION, max_workers=2)
+    computed = [sim.computed for sim in batch.simulations]
+    results_dict["batch_run_computed"] = bool(computed) and all(computed)
+
+    # at least one simulation must run at a time
+    try:
+        batch.run(SCDM_VERSION, max_workers=0)
+        results_dict["invalid_max_workers_rejected"] = False
+    except ValueError:
+        results_dict["invalid_max_workers_rejected"] = True
+
+    # processes already started are stopped when a later simulation fails to start
+    started = RecordedRun(batch.simulations[0])
+    try:
+        run_simulations([started, FailingRun()], SCDM_VERSION)
+        results_dict["failed_start_cleaned_up"] = False
+    except RuntimeError:
+        results_dict["failed_start_cleaned_up"] = started.process is not None and started.process.poll() is not None
+    shutil.rmtree(isolated_dir, True)
+
 
 results_dict = {}
 try:
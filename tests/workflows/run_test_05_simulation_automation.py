@@ -121,6 +121,12 @@ def main():
             grid_exported = True
     results_dict["grid_exported"] = grid_exported
     results_dict["curves_exported"] = curves_exported
+    # Check projected grids saved as CATPart
+    interactive.save_grids("Cam")
+    grid_file = os.path.abspath("Test_simulation.Cam.OPTProjectedGrid.CATPart")
+    results_dict["grids_saved"] = os.path.isfile(grid_file)
+    if os.path.isfile(grid_file):
+        os.remove(grid_file)
     GetActiveWindow().Close()
     DocumentOpen.Execute(scdm_file_2)
     sel = Selection.CreateByGroups("Sim")